@@ -4,6 +4,9 @@
 Общая точка входа для запуска УВМ из GUI (tkinter) или других оболочек.
 """
 
+from functools import lru_cache
+import threading
+import time
 from typing import Tuple
 
 from uvm_asm import full_asm
@@ -11,13 +14,42 @@ from uvm_memory import UVMMemory, dump_memory_to_xml_str
 from interpreter import run_program
 
 
-def assemble_source(source: str) -> Tuple[bytes, list]:
-    """Ассемблирует текст программы в (bytecode, IR)."""
-    bytecode, IR = full_asm(source)
+@lru_cache(maxsize=32)
+def _cached_assemble(source: str, optimize: int) -> Tuple[bytes, list]:
+    return full_asm(source, optimize=optimize)
+
+
+def assemble_source(source: str, optimize: int = 0) -> Tuple[bytes, list]:
+    """
+    Ассемблирует текст программы в (bytecode, IR).
+    optimize=1 (-O1) включает слияние пар команд в суперкоманды (uvm_asm.peephole).
+    Результат кэшируется по тексту программы и уровню оптимизации: повторный
+    запуск того же исходника не ассемблирует его заново. IR из кэша общий — не изменять.
+    """
+    bytecode, IR = _cached_assemble(source, optimize)
     return bytecode, IR
 
 
-def run_uvm_source(source: str) -> str:
+def clear_asm_cache():
+    """Сбрасывает кэш ассемблированных программ."""
+    _cached_assemble.cache_clear()
+
+
+# Память УВМ переиспользуется между запусками (своя на каждый поток)
+_local = threading.local()
+
+
+def _fresh_memory() -> UVMMemory:
+    """Возвращает обнулённую память УВМ текущего потока, создавая её при первом вызове."""
+    memory = getattr(_local, "memory", None)
+    if memory is None:
+        memory = _local.memory = UVMMemory()
+    else:
+        memory.reset()
+    return memory
+
+
+def run_uvm_source(source: str, optimize: int = 0) -> str:
     """
     Принимает текст программы на ассемблере,
     ассемблирует, запускает интерпретатор и возвращает
@@ -25,6 +57,7 @@ def run_uvm_source(source: str) -> str:
       - сгенерированным байт-кодом (в hex),
       - логом выполнения,
       - дампом памяти (XML, адреса 0..31).
+    optimize — уровень оптимизации ассемблера (см. assemble_source).
     """
 
     source = source.strip()
@@ -33,19 +66,19 @@ def run_uvm_source(source: str) -> str:
 
     # 1. Ассемблирование
     try:
-        bytecode, IR = assemble_source(source)
+        bytecode, IR = assemble_source(source, optimize)
     except Exception as e:
         return f"[ASM ERROR] {type(e).__name__}: {e}"
 
     # Строка с байтами в 16-ричном виде
     hex_bytes = " ".join(f"0x{b:02X}" for b in bytecode)
 
-    # 2. Память
-    memory = UVMMemory()
+    # 2. Память (переиспользуемая, обнуляется перед запуском)
+    memory = _fresh_memory()
 
     # 3. Запуск интерпретатора
     try:
-        log_text = run_program(bytecode, memory)
+        log_text = run_program(bytecode, memory, log=True)
     except Exception as e:
         log_text = f"[RUNTIME ERROR] {type(e).__name__}: {e}"
 
@@ -65,3 +98,40 @@ def run_uvm_source(source: str) -> str:
     parts.append(xml_dump)
 
     return "\n".join(parts)
+
+
+def benchmark_uvm_source(source: str, repeat: int = 1, optimize: int = 0) -> str:
+    """
+    Ассемблирует программу и выполняет её repeat раз без пошагового лога
+    (log=False). Возвращает строку с итогом последнего запуска и временем
+    выполнения.
+    """
+
+    if repeat < 1:
+        raise ValueError(f"Число запусков должно быть положительным, получено {repeat}")
+
+    source = source.strip()
+    if not source:
+        return "[WARN] Исходный текст пуст — нечего выполнять."
+
+    try:
+        bytecode, IR = assemble_source(source, optimize)
+    except Exception as e:
+        return f"[ASM ERROR] {type(e).__name__}: {e}"
+
+    try:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            memory = _fresh_memory()
+            summary = run_program(bytecode, memory, log=False)
+        elapsed = time.perf_counter() - started
+    except Exception as e:
+        return f"[RUNTIME ERROR] {type(e).__name__}: {e}"
+
+    parts = []
+    parts.append(summary)
+    parts.append("\n--- Замер ---")
+    parts.append(f"Запусков: {repeat}, инструкций в программе: {len(IR)}")
+    parts.append(f"Общее время: {elapsed:.6f} с, на запуск: {elapsed / repeat:.6f} с")
+
+    return "\n".join(parts)
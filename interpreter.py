@@ -1,9 +1,22 @@
 # interpreter.py
 import argparse
+from array import array
+from itertools import compress
 from pathlib import Path
+import struct
 import sys
 
-from uvm_memory import UVMMemory, OPCODE_NAMES, dump_memory_to_xml
+from uvm_memory import UVMMemory, OPCODE_TABLE, dump_memory_to_xml
+
+try:
+    from uvm_core import run_core as _compiled_core
+except ImportError:  # C-расширение uvm_core (Cython) не собрано
+    _compiled_core = None
+
+try:
+    from numba import njit
+except ImportError:  # numba — необязательная зависимость
+    njit = None
 
 
 def decode_instruction(instruction_bytes: bytes):
@@ -22,16 +35,176 @@ def decode_instruction(instruction_bytes: bytes):
     a = value & 0x7F
     b = value >> 7
 
-    cmd_name = OPCODE_NAMES.get(a)
+    cmd_name = OPCODE_TABLE[a]
     if cmd_name is None:
         raise ValueError(f"Неизвестный opcode (поле A): {a}")
     return cmd_name, b
 
 
-def run_program(bytecode: bytes, memory: UVMMemory) -> str:
+# --- Компактные индексы команд ---
+
+# Opcode (поле A) -> компактный индекс 0..5 (ops[i] после precompile)
+OPCODE_INDEX = {
+    14: 0,  # load_const
+    11: 1,  # read_value
+    94: 2,  # write_value
+    69: 3,  # less
+    15: 4,  # store_imm  (суперкоманда)
+    70: 5,  # less_from  (суперкоманда)
+}
+
+# Имена команд по компактному индексу (для лога)
+INDEX_NAMES = ("load_const", "read_value", "write_value", "less", "store_imm", "less_from")
+
+# Поле B суперкоманд: младшие 11 бит — адрес, остальное — константа/второй адрес
+_FUSED_SHIFT = 11
+_FUSED_MASK = (1 << _FUSED_SHIFT) - 1
+
+# Маски (по индексу команды) для проверки адресов в precompile()
+_PLAIN_ADDRESS_MASK = bytes(1 if index in (1, 2, 3) else 0 for index in range(256))
+_FUSED_MASK_TABLE = bytes(1 if index in (4, 5) else 0 for index in range(256))
+_LESS_FROM_MASK = bytes(1 if index == 5 else 0 for index in range(256))
+
+# Младший байт инструкции -> индекс команды (0xFF — неизвестный opcode).
+# Бит 7 младшего байта относится к полю B, поэтому маскируется.
+_OP_TRANSLATE = bytes(OPCODE_INDEX.get(byte & 0x7F, 0xFF) for byte in range(256))
+
+# Инструкция как (младший байт, старшие 32 бита): B = (low >> 7) | (high << 1)
+_INSTRUCTION = struct.Struct("<BI")
+
+
+def precompile(bytecode: bytes, data_size: int):
+    """
+    Декодирует весь байт-код один раз в два параллельных массива:
+        ops[i]      — индекс команды (0..5, см. OPCODE_INDEX),
+        operands[i] — поле B.
+    Декодирование выполняется пакетно (bytes.translate + struct.iter_unpack)
+    через memoryview — без копий байт-кода и int.from_bytes на каждую инструкцию.
+    Декодирование останавливается на первой некорректной инструкции
+    (неполной, с неизвестным opcode или с адресом вне 0..data_size-1) —
+    выполнено будет всё до неё. Поэтому при выполнении адреса не проверяются.
+    """
+    with memoryview(bytecode) as view:
+        # Срезы memoryview не копируют байт-код
+        whole = view[:len(view) - len(view) % 5]
+
+        ops = whole[::5].tobytes().translate(_OP_TRANSLATE)
+        stop = ops.find(0xFF)
+        if stop != -1:
+            ops = ops[:stop]
+            whole = whole[:stop * 5]
+
+        operands = array(
+            "q",  # поле B занимает до 33 бит
+            [(high << 1) | (low >> 7) for low, high in _INSTRUCTION.iter_unpack(whole)],
+        )
+
+    # Адреса простых команд работы с памятью — одним вызовом max() по маске
+    bad = max(compress(operands, ops.translate(_PLAIN_ADDRESS_MASK)), default=-1) >= data_size
+
+    # Суперкоманды: 11-битный младший адрес при полной памяти всегда допустим,
+    # а старший адрес less_from (B >> 11) монотонен по B — хватает одного max()
+    if not bad and (4 in ops or 5 in ops):
+        if data_size >= (1 << _FUSED_SHIFT):
+            bad = max(compress(operands, ops.translate(_LESS_FROM_MASK)), default=-1) >> _FUSED_SHIFT >= data_size
+        else:
+            fused = compress(zip(ops, operands), ops.translate(_FUSED_MASK_TABLE))
+            bad = max(_max_address(op, operand) for op, operand in fused) >= data_size
+
+    if bad:
+        stop = next(
+            i for i, (op, operand) in enumerate(zip(ops, operands))
+            if _max_address(op, operand) >= data_size
+        )
+        ops = ops[:stop]
+        del operands[stop:]
+
+    return array("B", ops), operands
+
+
+def _max_address(op: int, operand: int) -> int:
+    """Наибольший адрес памяти данных, к которому обращается команда (-1 — не обращается)."""
+    if op == 0:
+        return -1
+    if op == 4:
+        return operand & _FUSED_MASK
+    if op == 5:
+        return max(operand & _FUSED_MASK, operand >> _FUSED_SHIFT)
+    return operand
+
+
+def _run_core(ops, operands, data, ip, acc, trace):
+    """
+    Ядро интерпретатора над типизированными буферами.
+    ip, ACC и память данных — локальные переменные, без обращений к атрибутам
+    UVMMemory на каждом шаге. Если собрано расширение uvm_core, используется
+    его run_core; иначе, если установлен numba, ядро компилируется.
+    trace[i] получает значение ACC перед выполнением инструкции i — по нему
+    внешний run_program строит лог. Пустой trace — трасса не пишется:
+    для этого случая отдельный цикл, без проверки флага на каждом шаге.
+    Адреса уже проверены в precompile().
+    Возвращает (ip, acc).
+    """
+    n = len(ops)
+    if len(trace) == 0:
+        while ip < n:
+            op = ops[ip]
+            operand = operands[ip]
+            if op == 0:
+                acc = operand
+            elif op == 1:
+                acc = data[operand]
+            elif op == 2:
+                data[operand] = acc
+            elif op == 3:
+                data[operand] = 1 if data[operand] < acc else 0
+            elif op == 4:
+                acc = operand >> _FUSED_SHIFT
+                data[operand & _FUSED_MASK] = acc
+            else:
+                acc = data[operand & _FUSED_MASK]
+                dst = operand >> _FUSED_SHIFT
+                data[dst] = 1 if data[dst] < acc else 0
+            ip += 1
+        return ip, acc
+
+    while ip < n:
+        op = ops[ip]
+        operand = operands[ip]
+        trace[ip] = acc
+        if op == 0:
+            acc = operand
+        elif op == 1:
+            acc = data[operand]
+        elif op == 2:
+            data[operand] = acc
+        elif op == 3:
+            data[operand] = 1 if data[operand] < acc else 0
+        elif op == 4:
+            acc = operand >> _FUSED_SHIFT
+            data[operand & _FUSED_MASK] = acc
+        else:
+            acc = data[operand & _FUSED_MASK]
+            dst = operand >> _FUSED_SHIFT
+            data[dst] = 1 if data[dst] < acc else 0
+        ip += 1
+    return ip, acc
+
+
+# Чистый Python-вариант ядра — эталон для скомпилированных (см. test_uvm)
+_py_run_core = _run_core
+
+if _compiled_core is not None:
+    _run_core = _compiled_core
+elif njit is not None:
+    _run_core = njit(cache=True)(_run_core)
+
+
+def run_program(bytecode: bytes, memory: UVMMemory, log: bool = True) -> str:
     """
     Реализует основной цикл интерпретатора.
     Возвращает лог выполнения в виде строки.
+    При log=False пошаговый лог не строится — возвращается только итог.
 
     Команды:
       - load_const (A=14, B=константа):
@@ -44,59 +217,88 @@ def run_program(bytecode: bytes, memory: UVMMemory) -> str:
           lhs = MEM[B]
           rhs = ACC
           MEM[B] = 1 если lhs < rhs, иначе 0
+      - store_imm (A=15, B=адрес | константа << 11), суперкоманда:
+          ACC = константа; MEM[адрес] = ACC
+      - less_from (A=70, B=src | dst << 11), суперкоманда:
+          ACC = MEM[src]; MEM[dst] = 1 если MEM[dst] < ACC, иначе 0
     """
 
-    # Разбиваем байт-код по 5 байт
-    instructions = [bytecode[i:i + 5] for i in range(0, len(bytecode), 5)]
-    log_messages = []
+    # Предварительное декодирование всей программы
+    ops, operands = precompile(bytecode, len(memory.data))
+    total = (len(bytecode) + 4) // 5
+    n = len(ops)
 
-    log_messages.append(f"[INFO] Запуск программы. Всего инструкций: {len(instructions)}")
+    # trace[i] — ACC перед выполнением инструкции i (буфер выделяется один раз,
+    # строки лога форматируются после выполнения)
+    start_ip = memory.ip
+    trace = array("q", bytes(8 * n) if log else b"")
 
-    while memory.ip < len(instructions):
-        instruction_bytes = instructions[memory.ip]
-        current_ip = memory.ip
+    # IP и ACC читаются из memory один раз и записываются обратно после выполнения
+    if memory.ip < n:
+        memory.ip, memory.acc = _run_core(ops, operands, memory.as_array(), memory.ip, memory.acc, trace)
 
+    # Декодирование остановилось раньше конца программы: неизвестный opcode или
+    # неполная инструкция попадают в лог, адрес вне памяти данных — IndexError
+    stop_error = None
+    if memory.ip == n < total:
         try:
-            cmd, operand = decode_instruction(instruction_bytes)
-        except Exception as e:
-            log_messages.append(f"[RUNTIME ERROR] На адресе {memory.ip}: {e}")
-            break
-
-        log_messages.append(
-            f"[{current_ip:03d}] Выполняется: {cmd:<12} | B (операнд): {operand} | ACC={memory.acc}"
-        )
-
-        new_ip = current_ip + 1
-
-        # --- ВЫПОЛНЕНИЕ КОМАНД ---
-
-        if cmd == "load_const":
-            memory.acc = operand
-
-        elif cmd == "read_value":
-            value = memory.read_data(operand)
-            memory.acc = value
+            cmd, operand = decode_instruction(bytecode[n * 5:n * 5 + 5])
+        except ValueError as e:
+            stop_error = f"[RUNTIME ERROR] На адресе {n}: {e}"
+        else:
+            # У суперкоманды первая команда пары (load_const / read_value) успела бы
+            # выполниться: ACC — как после неё, затем та же ошибка, что у пары
+            if cmd == "store_imm":
+                memory.acc = operand >> _FUSED_SHIFT
+            elif cmd == "less_from" and operand & _FUSED_MASK < len(memory.data):
+                memory.acc = memory.data[operand & _FUSED_MASK]
+            raise _address_error(cmd, operand, len(memory.data))
+
+    log_messages = [f"[INFO] Запуск программы. Всего инструкций: {total}"]
+
+    # Лог формируется одним проходом по записанной трассе
+    if log:
+        log_messages += [
+            f"[{i:03d}] Выполняется: {INDEX_NAMES[ops[i]]:<12} | "
+            f"B (операнд): {operands[i] if ops[i] < 4 else _fused_operand_text(ops[i], operands[i])} | ACC={trace[i]}"
+            for i in range(start_ip, memory.ip)
+        ]
+
+    _finish_log(log_messages, memory, stop_error)
+    return "\n".join(log_messages)
 
-        elif cmd == "write_value":
-            memory.write_data(operand, memory.acc)
 
-        elif cmd == "less":
-            lhs = memory.read_data(operand)
-            rhs = memory.acc
-            result = 1 if lhs < rhs else 0
-            memory.write_data(operand, result)
+def _fused_operand_text(op: int, operand: int) -> str:
+    """Поле B суперкоманды для лога: два упакованных значения по отдельности."""
+    if op == 4:
+        return f"address={operand & _FUSED_MASK}, K={operand >> _FUSED_SHIFT}"
+    return f"src={operand & _FUSED_MASK}, dst={operand >> _FUSED_SHIFT}"
 
-        else:
-            log_messages.append(f"[RUNTIME ERROR] Неизвестная команда: {cmd}")
-            break
 
-        memory.ip = new_ip
+def _address_error(cmd: str, operand: int, data_size: int) -> IndexError:
+    """
+    Ошибка для инструкции, на адресе которой precompile() остановил декодирование
+    (адрес вне 0..data_size-1). Текст совпадает с UVMMemory.read_data/write_data.
+    """
+    if cmd == "write_value":
+        return IndexError(f"Недопустимый адрес для записи: {operand}")
+    if cmd == "store_imm":
+        return IndexError(f"Недопустимый адрес для записи: {operand & _FUSED_MASK}")
+    if cmd == "less_from":
+        src = operand & _FUSED_MASK
+        address = src if src >= data_size else operand >> _FUSED_SHIFT
+        return IndexError(f"Недопустимый адрес для чтения: {address}")
+    return IndexError(f"Недопустимый адрес для чтения: {operand}")
+
+
+def _finish_log(log_messages: list, memory: UVMMemory, stop_error: str = None):
+    """Дописывает в лог причину остановки декодирования (если есть) и итог выполнения."""
+    if stop_error is not None:
+        log_messages.append(stop_error)
 
     log_messages.append(f"\n--- Выполнение программы завершено на IP={memory.ip} ---")
     log_messages.append(f"Финальный ACC: {memory.acc}")
-    log_messages.append(f"Память (первые 16 ячеек): {memory.data[:16]}")
-
-    return "\n".join(log_messages)
+    log_messages.append(f"Память (первые 16 ячеек): {memory.data[:16].tolist()}")
 
 
 # --- CLI-оболочка (для запуска из консоли) ---
@@ -111,6 +313,11 @@ def parse_args():
         help="Диапазон адресов памяти для дампа (например, 0:10).",
         type=str
     )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Не выводить пошаговый лог выполнения (только итог)."
+    )
     return parser.parse_args()
 
 
@@ -133,8 +340,8 @@ def main():
         memory = UVMMemory()
 
         # Запуск и вывод лога в консоль
-        log = run_program(bytecode, memory)
-        print(log)
+        log_text = run_program(bytecode, memory, log=not args.quiet)
+        print(log_text)
 
         # Дамп памяти после выполнения
         dump_memory_to_xml(memory, start_addr, end_addr, dump_file)
@@ -0,0 +1,353 @@
+# test_uvm.py
+
+"""
+Тесты парсера full_asm, -O1 (peephole/суперкоманды), предекодирования, ошибок
+адресов, скомпилированных ядер интерпретатора, кэша и памяти core_runner.
+Запуск: python -m unittest test_uvm
+"""
+
+from array import array
+import importlib.util
+import random
+import threading
+import unittest
+
+from uvm_asm import (
+    DATA_SIZE, FUSED_CONST_LIMIT, OP_LESS_FROM, OP_STORE_IMM,
+    asm, asm_less, asm_less_from, asm_load_const, asm_read_value, asm_store_imm, asm_write_value,
+    full_asm, pack_instruction, peephole,
+)
+from uvm_memory import UVMMemory
+from core_runner import _fresh_memory, assemble_source, clear_asm_cache
+from interpreter import INDEX_NAMES, _py_run_core, precompile, run_program
+
+
+def _names(ops) -> list:
+    return [INDEX_NAMES[op] for op in ops]
+
+
+def _random_source(rng: random.Random, length: int) -> str:
+    lines = []
+    for _ in range(length):
+        cmd = rng.choice(("load_const", "read_value", "write_value", "less"))
+        if cmd == "load_const":
+            arg = rng.choice((0, 1, FUSED_CONST_LIMIT - 1, FUSED_CONST_LIMIT, rng.randrange(1 << 20)))
+        else:
+            arg = rng.choice((0, 1, 2, rng.randrange(DATA_SIZE), DATA_SIZE - 1))
+        lines.append(f"{cmd}; {arg}")
+    return "\n".join(lines)
+
+
+def _original_full_asm(text: str) -> tuple[bytes, list]:
+    """Исходный (до оптимизаций) разбор full_asm: strip/split по строкам."""
+    text = text.strip()
+    IR = []
+
+    for line in text.splitlines():
+        line = line.strip()
+        if "#" in line:
+            line = line.split("#")[0].strip()
+        if not line:
+            continue
+        parts = line.split(";")
+        cmd = parts[0].strip()
+        if len(parts) > 1 and parts[1].strip():
+            IR.append((cmd, int(parts[1].strip())))
+        else:
+            raise ValueError(f"Команда '{cmd}' требует аргумент (формат: '{cmd}; число').")
+
+    return asm(IR), IR
+
+
+def _outcome(parse, text: str):
+    try:
+        return parse(text)
+    except ValueError as e:
+        return f"ValueError: {e}"
+
+
+class ParserTest(unittest.TestCase):
+    def _check(self, text: str):
+        self.assertEqual(_outcome(full_asm, text), _outcome(_original_full_asm, text), repr(text))
+
+    def test_line_separators(self):
+        # Одиночные \r, VT, FF, NEL, U+2028 — тоже границы строк (str.splitlines)
+        for sep in ("\n", "\r\n", "\r", "\v", "\f", "\x1c", "\x85", "\u2028"):
+            text = sep.join(["load_const; 5", "write_value; 3", "read_value; 3"]) + sep
+            self._check(text)
+            self.assertEqual(len(full_asm(text)[1]), 3)
+
+    def test_comments_and_blank_lines(self):
+        self._check("# программа\n\nload_const; 7 # K\n   \n\twrite_value ;2047#x\n#;;\n")
+        self.assertEqual(full_asm("load_const; 7 # K\n# write_value; 1\n")[1], [("load_const", 7)])
+
+    def test_extra_fields(self):
+        self._check("load_const; 5; 6\nwrite_value; 3;\nless;4;junk # c")
+        self.assertEqual(full_asm("load_const; 5; 6")[1], [("load_const", 5)])
+
+    def test_missing_argument(self):
+        for text in ("load_const", "load_const;", "load_const; # 5", "write_value;  \n", "; "):
+            self._check(text)
+            with self.assertRaises(ValueError):
+                full_asm(text)
+
+    def test_non_canonical_literals(self):
+        self._check("load_const; 05\nread_value; +3\nwrite_value;  0007 \nload_const; \u0663")
+        self.assertEqual(full_asm("load_const; 05\nread_value; +3")[1], [("load_const", 5), ("read_value", 3)])
+        self._check("load_const; -1")
+        self._check("load_const; 1_000")
+        self._check("load_const; x")
+
+    def test_unknown_and_odd_commands(self):
+        self._check("foo; 1")
+        self._check("  load_const; 5")
+        self._check("LOAD_CONST; 5")
+        self._check("load_const\u00a0; 5")
+
+    def test_random_sources(self):
+        rng = random.Random(1)
+        alphabet = (
+            "load_const", "read_value", "write_value", "less", "foo", ";", "; ", " ", "\t", "#",
+            "\r", "\n", "\r\n", "\v", "\x85", "\xa0", "5", "12", "05", "+4", "-3", "2047", "2048",
+        )
+        for _ in range(3000):
+            self._check("".join(rng.choice(alphabet) for _ in range(rng.randrange(12))))
+
+
+class PeepholeTest(unittest.TestCase):
+    def test_fuses_pairs_at_limits(self):
+        IR = [
+            ("load_const", FUSED_CONST_LIMIT - 1), ("write_value", DATA_SIZE - 1),
+            ("read_value", DATA_SIZE - 1), ("less", DATA_SIZE - 1),
+            ("load_const", 0), ("write_value", 0),
+        ]
+        self.assertEqual(peephole(IR), [
+            ("store_imm", DATA_SIZE - 1, FUSED_CONST_LIMIT - 1),
+            ("less_from", DATA_SIZE - 1, DATA_SIZE - 1),
+            ("store_imm", 0, 0),
+        ])
+
+    def test_keeps_pairs_outside_limits(self):
+        IR = [
+            ("load_const", FUSED_CONST_LIMIT), ("write_value", 5),
+            ("load_const", -1), ("write_value", 5),
+            ("load_const", 5), ("write_value", DATA_SIZE),
+            ("read_value", DATA_SIZE), ("less", 0),
+            ("read_value", 0), ("less", DATA_SIZE),
+        ]
+        self.assertEqual(peephole(IR), IR)
+
+    def test_pairs_are_not_overlapping(self):
+        IR = [("load_const", 1), ("load_const", 2), ("write_value", 3), ("write_value", 4)]
+        self.assertEqual(peephole(IR), [("load_const", 1), ("store_imm", 3, 2), ("write_value", 4)])
+
+
+class PrecompileTest(unittest.TestCase):
+    def test_full_memory_accepts_fused_addresses(self):
+        bytecode = asm_store_imm(DATA_SIZE - 1, 7) + asm_less_from(0, DATA_SIZE - 1)
+        ops, operands = precompile(bytecode, DATA_SIZE)
+        self.assertEqual(_names(ops), ["store_imm", "less_from"])
+
+    def test_full_memory_stops_at_less_from_destination(self):
+        # dst вне памяти: asm() такое не собирает, поле B задаём напрямую
+        bad = pack_instruction(OP_LESS_FROM, 1 | (DATA_SIZE << 11))
+        ops, operands = precompile(asm_load_const(1) + bad + asm_load_const(2), DATA_SIZE)
+        self.assertEqual(_names(ops), ["load_const"])
+
+    def test_small_memory_checks_both_fused_addresses(self):
+        size = 64
+        good = asm_store_imm(size - 1, 7) + asm_less_from(size - 1, size - 1)
+        self.assertEqual(len(precompile(good, size)[0]), 2)
+
+        for bad in (asm_store_imm(size, 7), asm_less_from(size, 0), asm_less_from(0, size)):
+            ops, operands = precompile(good + bad + good, size)
+            self.assertEqual(len(ops), 2)
+            self.assertEqual(len(operands), 2)
+
+    def test_small_memory_store_imm_constant_is_not_an_address(self):
+        ops, operands = precompile(asm_store_imm(0, FUSED_CONST_LIMIT - 1), 64)
+        self.assertEqual(_names(ops), ["store_imm"])
+
+
+class AddressErrorTest(unittest.TestCase):
+    def _run(self, bytecode: bytes, acc: int, size: int = 64) -> str:
+        memory = UVMMemory(size)
+        with self.assertRaises(IndexError) as ctx:
+            run_program(asm_load_const(5) + asm_write_value(1) + asm_load_const(9) + bytecode, memory)
+        # Всё до ошибочной инструкции выполнено; у суперкоманды ACC — как после
+        # первой команды пары
+        self.assertEqual(memory.data[1], 5)
+        self.assertEqual(memory.ip, 3)
+        self.assertEqual(memory.acc, acc)
+        return str(ctx.exception)
+
+    def test_write_value(self):
+        self.assertEqual(self._run(asm_write_value(100), 9), "Недопустимый адрес для записи: 100")
+
+    def test_store_imm(self):
+        self.assertEqual(self._run(asm_store_imm(100, 7), 7), "Недопустимый адрес для записи: 100")
+
+    def test_less_from_source(self):
+        self.assertEqual(self._run(asm_less_from(100, 200), 9), "Недопустимый адрес для чтения: 100")
+
+    def test_less_from_destination(self):
+        self.assertEqual(self._run(asm_less_from(1, 100), 5), "Недопустимый адрес для чтения: 100")
+
+    def test_less_from_destination_full_memory(self):
+        bad = pack_instruction(OP_LESS_FROM, 1 | (DATA_SIZE << 11))
+        self.assertEqual(self._run(bad, 5, DATA_SIZE), f"Недопустимый адрес для чтения: {DATA_SIZE}")
+
+    def test_fused_error_state_matches_pair(self):
+        pairs = [
+            (asm_store_imm(100, 7), asm_load_const(7) + asm_write_value(100)),
+            (asm_less_from(1, 100), asm_read_value(1) + asm_less(100)),
+            (asm_less_from(100, 1), asm_read_value(100) + asm_less(1)),
+        ]
+        for fused, pair in pairs:
+            states = []
+            for bytecode in (fused, pair):
+                memory = UVMMemory(64)
+                with self.assertRaises(IndexError) as ctx:
+                    run_program(asm_load_const(5) + asm_write_value(1) + bytecode, memory)
+                states.append((str(ctx.exception), memory.acc, memory.data.tolist()))
+            self.assertEqual(states[0], states[1])
+
+    def test_unknown_opcode_is_logged(self):
+        memory = UVMMemory()
+        log = run_program(asm_load_const(5) + bytes(5), memory)
+        self.assertIn("[RUNTIME ERROR] На адресе 1:", log)
+        self.assertEqual((memory.ip, memory.acc), (1, 5))
+
+
+class OptimizeTest(unittest.TestCase):
+    def _final_state(self, source: str, optimize: int, log: bool):
+        bytecode, IR = full_asm(source, optimize=optimize)
+        memory = UVMMemory()
+        run_program(bytecode, memory, log=log)
+        return memory.acc, memory.data.tolist()
+
+    def _check(self, source: str):
+        for log in (True, False):
+            self.assertEqual(self._final_state(source, 1, log), self._final_state(source, 0, log))
+
+    def test_example_program(self):
+        self._check("load_const; 381\nread_value; 435\nwrite_value; 308\nless; 989\n")
+
+    def test_random_programs(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            self._check(_random_source(rng, rng.randrange(1, 40)))
+
+    def test_log_shows_fused_fields(self):
+        bytecode, IR = full_asm("load_const; 381\nwrite_value; 308\nread_value; 308\nless; 989\n", optimize=1)
+        log = run_program(bytecode, UVMMemory())
+        self.assertIn("store_imm    | B (операнд): address=308, K=381 | ACC=0", log)
+        self.assertIn("less_from    | B (операнд): src=308, dst=989 | ACC=381", log)
+
+    def test_optimized_ir_is_shorter(self):
+        bytecode, IR = full_asm("load_const; 7\nwrite_value; 3\nread_value; 3\nless; 4\n", optimize=1)
+        self.assertEqual(IR, [("store_imm", 3, 7), ("less_from", 3, 4)])
+        self.assertEqual(bytecode[0] & 0x7F, OP_STORE_IMM)
+        self.assertEqual(asm(IR), bytecode)
+
+
+class CompiledCoreTest(unittest.TestCase):
+    """Скомпилированное ядро (numba / uvm_core) против чистого Python-цикла _run_core."""
+
+    def _compare(self, run_core):
+        rng = random.Random(2)
+        for optimize in (0, 1, 0, 1):
+            bytecode, IR = full_asm(_random_source(rng, 500), optimize=optimize)
+            ops, operands = precompile(bytecode, DATA_SIZE)
+            initial = array("q", [rng.randrange(-3, 4) for _ in range(DATA_SIZE)])
+            for log in (True, False):
+                results = []
+                for core in (_py_run_core, run_core):
+                    data = array("q", initial)
+                    trace = array("q", bytes(8 * len(ops)) if log else b"")
+                    results.append((core(ops, operands, data, 0, 7, trace), data.tolist(), trace.tolist()))
+                self.assertEqual(results[0], results[1])
+
+    @unittest.skipUnless(importlib.util.find_spec("numba"), "numba не установлен")
+    def test_numba_core(self):
+        from numba import njit
+        self._compare(njit(_py_run_core))
+
+    @unittest.skipUnless(importlib.util.find_spec("uvm_core"), "расширение uvm_core не собрано")
+    def test_cython_core(self):
+        from uvm_core import run_core
+        self._compare(run_core)
+
+
+class AsmCacheTest(unittest.TestCase):
+    SOURCE = "load_const; 7\nwrite_value; 3\n"
+
+    def setUp(self):
+        clear_asm_cache()
+
+    def test_hit_returns_same_objects(self):
+        bytecode, IR = assemble_source(self.SOURCE)
+        again = assemble_source(self.SOURCE)
+        self.assertIs(again[0], bytecode)
+        self.assertIs(again[1], IR)
+
+    def test_clear_invalidates(self):
+        bytecode, IR = assemble_source(self.SOURCE)
+        clear_asm_cache()
+        again = assemble_source(self.SOURCE)
+        self.assertIsNot(again[1], IR)
+        self.assertEqual(again, (bytecode, IR))
+
+    def test_optimize_is_part_of_key(self):
+        plain = assemble_source(self.SOURCE)
+        fused = assemble_source(self.SOURCE, optimize=1)
+        self.assertEqual(plain[1], [("load_const", 7), ("write_value", 3)])
+        self.assertEqual(fused[1], [("store_imm", 3, 7)])
+        self.assertIs(assemble_source(self.SOURCE)[1], plain[1])
+        self.assertIs(assemble_source(self.SOURCE, optimize=1)[1], fused[1])
+
+
+class MemoryReuseTest(unittest.TestCase):
+    def _dirty(self, memory: UVMMemory):
+        memory.data[0] = 5
+        memory.data[len(memory.data) - 1] = -7
+        memory.push(1)
+        memory.ip = 3
+        memory.acc = 9
+
+    def test_reset_keeps_data_array(self):
+        memory = UVMMemory(16)
+        data, stack = memory.data, memory.stack
+        self._dirty(memory)
+        memory.reset()
+        self.assertIs(memory.data, data)
+        self.assertIs(memory.stack, stack)
+        self.assertEqual(memory.data.tolist(), [0] * 16)
+        self.assertEqual((memory.stack, memory.ip, memory.acc), ([], 0, 0))
+
+    def test_reset_does_not_share_zero_template(self):
+        first, second = UVMMemory(16), UVMMemory(16)
+        first.reset()
+        first.data[0] = 5
+        second.data[0] = 6
+        second.reset()
+        self.assertEqual(second.data.tolist(), [0] * 16)
+        self.assertEqual(first.data[0], 5)
+
+    def test_fresh_memory_is_reused_per_thread(self):
+        memory = _fresh_memory()
+        self._dirty(memory)
+        again = _fresh_memory()
+        self.assertIs(again, memory)
+        self.assertEqual(again.data.tolist(), [0] * len(again.data))
+        self.assertEqual((again.stack, again.ip, again.acc), ([], 0, 0))
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(_fresh_memory()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], memory)
+
+
+if __name__ == "__main__":
+    unittest.main()
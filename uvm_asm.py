@@ -1,7 +1,10 @@
 # uvm_asm.py
 import pprint
+import struct
 import sys
 
+from uvm_memory import DATA_SIZE
+
 # ------------------------------------------------------------
 # Кодирование инструкции по спецификации:
 #   Биты 0–6: поле A (opcode)
@@ -9,18 +12,35 @@ import sys
 # Размер команды: 5 байт, порядок little-endian.
 # ------------------------------------------------------------
 
+def check_fields(a: int, b: int):
+    """Проверяет, что поля A и B помещаются в отведённые им биты."""
+    if a < 0 or a >= (1 << 7):
+        raise ValueError(f"Поле A (opcode) должно помещаться в 7 бит: 0..127, получено {a}")
+    if b < 0 or b >= (1 << 26):
+        raise ValueError(f"Поле B (операнд) должно помещаться в 26 бит: 0..(2^26-1), получено {b}")
+
+
+# Значение инструкции как 8 байт little-endian (используются младшие 5)
+_PACK_Q = struct.Struct("<Q").pack
+
+# Инструкция как (младший байт, старшие 32 бита) — ровно 5 байт little-endian
+_INSTRUCTION = struct.Struct("<BI")
+
+
+def check_address(address: int):
+    """Проверяет, что адрес операнда лежит внутри памяти данных УВМ."""
+    if address >= DATA_SIZE:
+        raise ValueError(f"Адрес должен лежать в памяти данных: 0..{DATA_SIZE - 1}, получено {address}")
+
+
 def pack_instruction(a: int, b: int) -> bytes:
     """
     Упаковывает A и B в 5 байт по спецификации:
         value = A | (B << 7)
     """
-    if a < 0 or a >= (1 << 7):
-        raise ValueError(f"Поле A (opcode) должно помещаться в 7 бит: 0..127, получено {a}")
-    if b < 0 or b >= (1 << 26):
-        raise ValueError(f"Поле B (операнд) должно помещаться в 26 бит: 0..(2^26-1), получено {b}")
+    check_fields(a, b)
 
-    value = a | (b << 7)
-    return value.to_bytes(5, "little")
+    return _PACK_Q(a | (b << 7))[:5]
 
 
 # --- Коды операций согласно спецификации УВМ (поле A, биты 0–6) ---
@@ -30,6 +50,25 @@ OP_READ       = 11  # Чтение значения из памяти
 OP_WRITE      = 94  # Запись значения в память
 OP_LESS       = 69  # Бинарная операция "<"
 
+# Суперкоманды (свободные коды поля A), создаются peephole() при optimize >= 1
+OP_STORE_IMM  = 15  # load_const K; write_value A  ->  store_imm(A, K)
+OP_LESS_FROM  = 70  # read_value A; less B         ->  less_from(A, B)
+
+# Суперкоманды упаковывают в 26-битное поле B два значения:
+#   младшие 11 бит — адрес, старшие 15 бит — константа или второй адрес
+FUSED_ADDR_BITS = 11
+FUSED_CONST_LIMIT = 1 << (26 - FUSED_ADDR_BITS)
+
+# Имя команды ассемблера -> opcode
+OP_ID = {
+    "load_const": OP_LOAD_CONST,
+    "read_value": OP_READ,
+    "write_value": OP_WRITE,
+    "less": OP_LESS,
+    "store_imm": OP_STORE_IMM,
+    "less_from": OP_LESS_FROM,
+}
+
 
 # --- Функции генерации байт-кода под новую спецификацию ---
 
@@ -50,7 +89,9 @@ def asm_read_value(address: int) -> bytes:
     Тест (A=11, B=435):
         0x8B, 0xD9, 0x00, 0x00, 0x00
     """
-    return pack_instruction(OP_READ, address)
+    instruction = pack_instruction(OP_READ, address)
+    check_address(address)
+    return instruction
 
 
 def asm_write_value(address: int) -> bytes:
@@ -60,7 +101,9 @@ def asm_write_value(address: int) -> bytes:
     Тест (A=94, B=308):
         0x5E, 0x9A, 0x00, 0x00, 0x00
     """
-    return pack_instruction(OP_WRITE, address)
+    instruction = pack_instruction(OP_WRITE, address)
+    check_address(address)
+    return instruction
 
 
 def asm_less(address: int) -> bytes:
@@ -74,7 +117,93 @@ def asm_less(address: int) -> bytes:
     Тест (A=69, B=989):
         0xC5, 0xEE, 0x01, 0x00, 0x00
     """
-    return pack_instruction(OP_LESS, address)
+    instruction = pack_instruction(OP_LESS, address)
+    check_address(address)
+    return instruction
+
+
+def fused_operand(a: int, arg) -> int:
+    """
+    Собирает поле B суперкоманды из двух аргументов:
+        store_imm(address, const):  B = address | (const << 11)
+        less_from(src, dst):        B = src | (dst << 11)
+    """
+    if len(arg) != 2:
+        raise ValueError(f"Суперкоманда (A={a}) требует два аргумента, получено {len(arg)}")
+    low, high = arg
+
+    if low < 0:
+        raise ValueError(f"Адрес должен лежать в памяти данных: 0..{DATA_SIZE - 1}, получено {low}")
+    check_address(low)
+    if a == OP_STORE_IMM:
+        if high < 0 or high >= FUSED_CONST_LIMIT:
+            raise ValueError(
+                f"Константа store_imm должна помещаться в 15 бит: 0..{FUSED_CONST_LIMIT - 1}, получено {high}"
+            )
+    else:
+        if high < 0:
+            raise ValueError(f"Адрес должен лежать в памяти данных: 0..{DATA_SIZE - 1}, получено {high}")
+        check_address(high)
+
+    return low | (high << FUSED_ADDR_BITS)
+
+
+def asm_store_imm(address: int, const: int) -> bytes:
+    """
+    Суперкоманда "запись константы" (load_const const; write_value address).
+    A = 15, B = address | (const << 11).
+    Тест (A=15, address=308, const=381):
+        0x0F, 0x9A, 0xF4, 0x05, 0x00
+    """
+    return pack_instruction(OP_STORE_IMM, fused_operand(OP_STORE_IMM, (address, const)))
+
+
+def asm_less_from(src: int, dst: int) -> bytes:
+    """
+    Суперкоманда "сравнение из памяти" (read_value src; less dst).
+    A = 70, B = src | (dst << 11).
+    Тест (A=70, src=435, dst=989):
+        0xC6, 0xD9, 0x74, 0x0F, 0x00
+    """
+    return pack_instruction(OP_LESS_FROM, fused_operand(OP_LESS_FROM, (src, dst)))
+
+
+# --- Peephole-оптимизация IR (optimize >= 1) ---
+
+def peephole(IR: list) -> list:
+    """
+    Заменяет пары команд суперкомандами (вдвое меньше диспетчеризаций):
+        ('load_const', K), ('write_value', A)  ->  ('store_imm', A, K)
+        ('read_value', A), ('less', B)         ->  ('less_from', A, B)
+    Пара сливается, только если аргументы помещаются в поле B суперкоманды;
+    иначе команды остаются как есть (и ошибки выдаёт обычная проверка asm()).
+    Состояние после суперкоманды (ACC и память) то же, что после пары, в том
+    числе при ошибке адреса (IP тогда указывает на саму суперкоманду).
+    """
+    result = []
+    i = 0
+    n = len(IR)
+
+    while i < n:
+        op, *arg = IR[i]
+        if i + 1 < n and len(arg) == 1:
+            next_op, *next_arg = IR[i + 1]
+            if len(next_arg) == 1:
+                x, y = arg[0], next_arg[0]
+                if (op == "load_const" and next_op == "write_value"
+                        and 0 <= x < FUSED_CONST_LIMIT and 0 <= y < DATA_SIZE):
+                    result.append(("store_imm", y, x))
+                    i += 2
+                    continue
+                if (op == "read_value" and next_op == "less"
+                        and 0 <= x < DATA_SIZE and 0 <= y < DATA_SIZE):
+                    result.append(("less_from", x, y))
+                    i += 2
+                    continue
+        result.append(IR[i])
+        i += 1
+
+    return result
 
 
 # --- Главная функция трансляции IR в байт-код ---
@@ -87,25 +216,41 @@ def asm(IR: list) -> bytes:
         ('read_value', address)
         ('write_value', address)
         ('less', address)
+        ('store_imm', address, const)   — суперкоманды, см. peephole()
+        ('less_from', src, dst)
+    Байт-код записывается в заранее выделенный буфер (5 байт на команду).
+    Адреса команд работы с памятью проверяются здесь, один раз, — интерпретатор
+    их уже не проверяет.
     """
-    bytecode = bytes()
-    for op, *arg in IR:
-        if op == "load_const":
-            bytecode += asm_load_const(arg[0])
-        elif op == "read_value":
-            bytecode += asm_read_value(arg[0])
-        elif op == "write_value":
-            bytecode += asm_write_value(arg[0])
-        elif op == "less":
-            bytecode += asm_less(arg[0])
-        else:
+    buf = bytearray(5 * len(IR))
+    pack_into = _INSTRUCTION.pack_into
+
+    for offset, (op, *arg) in zip(range(0, len(buf), 5), IR):
+        a = OP_ID.get(op)
+        if a is None:
             raise ValueError(f"Неизвестная команда ассемблера: {op}")
-    return bytecode
+        if a == OP_STORE_IMM or a == OP_LESS_FROM:
+            b = fused_operand(a, arg)
+        else:
+            b = arg[0]
+            check_fields(a, b)
+            if a != OP_LOAD_CONST:
+                check_address(b)
+
+        value = a | (b << 7)
+        pack_into(buf, offset, value & 0xFF, value >> 8)
+
+    return bytes(buf)
 
 
 # --- Парсер исходного текста ASM в IR и байт-код ---
 
-def full_asm(text: str) -> tuple[bytes, list]:
+# Десятичная запись -> число для типичных операндов (адреса памяти данных):
+# поиск в словаре вместо разбора int() на каждой строке
+_SMALL_INTS = {str(i): i for i in range(DATA_SIZE)}
+
+
+def full_asm(text: str, optimize: int = 0) -> tuple[bytes, list]:
     """
     Читает текст программы, преобразует его в байт-код и IR.
     Формат строки: "команда; аргумент"
@@ -114,30 +259,41 @@ def full_asm(text: str) -> tuple[bytes, list]:
         write_value; 308
         less; 989
     Комментарии после '#' игнорируются.
+    Строка в точной форме "команда; число" (известная команда, число из цифр)
+    разбирается одним str.partition; остальные строки (пустые, комментарии,
+    ошибочные, с другими пробелами) — прежней цепочкой strip/split.
+    optimize=1 (-O1) — перед генерацией байт-кода IR проходит peephole();
+    возвращается уже оптимизированный IR (он соответствует байт-коду).
     """
-    text = text.strip()
     IR = []
+    small_ints = _SMALL_INTS
+    op_id = OP_ID
 
     for line in text.splitlines():
-        line = line.strip()
+        # Быстрый путь: строка ровно "команда; число"
+        cmd, sep, arg = line.partition("; ")
+        if cmd not in op_id or not arg.isdecimal():
+            line = line.strip()
 
-        # 1. Удаляем хвостовой комментарий
-        if "#" in line:
-            line = line.split("#")[0].strip()
+            # 1. Удаляем хвостовой комментарий
+            if "#" in line:
+                line = line.split("#")[0].strip()
 
-        # 2. Пустые строки игнорируем
-        if not line:
-            continue
+            # 2. Пустые строки игнорируем
+            if not line:
+                continue
 
-        # 3. Парсинг "cmd; arg"
-        parts = line.split(";")
-        cmd = parts[0].strip()
+            # 3. Парсинг "cmd; arg"
+            parts = line.split(";")
+            cmd = parts[0].strip()
+            arg = parts[1].strip() if len(parts) > 1 else ""
+            if not arg:
+                raise ValueError(f"Команда '{cmd}' требует аргумент (формат: '{cmd}; число').")
 
-        if len(parts) > 1 and parts[1].strip():
-            arg = parts[1].strip()
-            IR.append((cmd, int(arg)))
-        else:
-            raise ValueError(f"Команда '{cmd}' требует аргумент (формат: '{cmd}; число').")
+        IR.append((cmd, small_ints[arg] if arg in small_ints else int(arg)))
+
+    if optimize >= 1:
+        IR = peephole(IR)
 
     # Генерируем байт-код
     bytecode = asm(IR)
@@ -161,7 +317,7 @@ def print_ir_test_mode(IR: list, bytecode: bytes):
         current_byte_index += 5
 
         opcode_hex = " ".join(f"{b:02X}" for b in instruction_bytes)
-        arg_value = arg[0] if arg else "N/A"
+        arg_value = ", ".join(map(str, arg)) if arg else "N/A"
 
         print(f"[{i:02d}] Команда: {op:<12} | Bytes: {opcode_hex} | IR аргумент: {arg_value}")
 
@@ -179,6 +335,10 @@ def test_asm_functions():
         assert list(asm_write_value(308)) == [0x5E, 0x9A, 0x00, 0x00, 0x00], "Test write_value failed"
         # Бинарная операция "<" (A=69, B=989):
         assert list(asm_less(989)) == [0xC5, 0xEE, 0x01, 0x00, 0x00], "Test less failed"
+        # Суперкоманда store_imm (A=15, address=308, const=381):
+        assert list(asm_store_imm(308, 381)) == [0x0F, 0x9A, 0xF4, 0x05, 0x00], "Test store_imm failed"
+        # Суперкоманда less_from (A=70, src=435, dst=989):
+        assert list(asm_less_from(435, 989)) == [0xC6, 0xD9, 0x74, 0x0F, 0x00], "Test less_from failed"
 
         print("[INFO] Встроенные тесты asm_функций пройдены успешно.")
     except AssertionError as e:
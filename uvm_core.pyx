@@ -0,0 +1,84 @@
+# uvm_core.pyx
+# cython: language_level=3, boundscheck=False, wraparound=False
+
+"""
+Ядро интерпретатора УВМ на Cython (необязательное C-расширение).
+
+Сборка (в каталоге проекта):
+    cythonize -i uvm_core.pyx
+
+Если расширение не собрано, interpreter.py использует собственный
+_run_core (numba или чистый Python) с тем же интерфейсом.
+"""
+
+# Поле B суперкоманд: младшие 11 бит — адрес, остальное — константа/второй адрес
+cdef enum:
+    FUSED_SHIFT = 11
+    FUSED_MASK = 0x7FF
+
+
+cpdef tuple run_core(
+    const unsigned char[::1] ops,
+    const long long[::1] operands,
+    long long[::1] data,
+    Py_ssize_t ip,
+    long long acc,
+    long long[::1] trace,
+):
+    """
+    То же, что interpreter._run_core: выполняет предекодированную программу
+    (ops, operands после precompile) над памятью данных data.
+    trace[i] получает значение ACC перед инструкцией i; пустой trace — трасса не пишется
+    (отдельный цикл без проверки флага на каждом шаге).
+    Адреса уже проверены в precompile(), поэтому проверки границ отключены.
+    Возвращает (ip, acc).
+    """
+    cdef Py_ssize_t n = ops.shape[0]
+    cdef unsigned char op
+    cdef long long operand, dst
+
+    if trace.shape[0] == 0:
+        while ip < n:
+            op = ops[ip]
+            operand = operands[ip]
+            if op == 0:
+                acc = operand
+            elif op == 1:
+                acc = data[operand]
+            elif op == 2:
+                data[operand] = acc
+            elif op == 3:
+                data[operand] = 1 if data[operand] < acc else 0
+            elif op == 4:
+                acc = operand >> FUSED_SHIFT
+                data[operand & FUSED_MASK] = acc
+            else:
+                acc = data[operand & FUSED_MASK]
+                dst = operand >> FUSED_SHIFT
+                data[dst] = 1 if data[dst] < acc else 0
+            ip += 1
+        return ip, acc
+
+    while ip < n:
+        op = ops[ip]
+        operand = operands[ip]
+        trace[ip] = acc
+
+        if op == 0:
+            acc = operand
+        elif op == 1:
+            acc = data[operand]
+        elif op == 2:
+            data[operand] = acc
+        elif op == 3:
+            data[operand] = 1 if data[operand] < acc else 0
+        elif op == 4:
+            acc = operand >> FUSED_SHIFT
+            data[operand & FUSED_MASK] = acc
+        else:
+            acc = data[operand & FUSED_MASK]
+            dst = operand >> FUSED_SHIFT
+            data[dst] = 1 if data[dst] < acc else 0
+        ip += 1
+
+    return ip, acc
@@ -3,7 +3,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
-from core_runner import run_uvm_source
+from core_runner import run_uvm_source, clear_asm_cache
 
 
 class UvmGuiApp(tk.Tk):
@@ -24,6 +24,18 @@ class UvmGuiApp(tk.Tk):
             text="Ассемблировать и выполнить",
             command=self.on_run_clicked
         )
+        self.btn_clear_cache = ttk.Button(
+            self.toolbar,
+            text="Сбросить кэш ассемблера",
+            command=self.on_clear_cache_clicked
+        )
+        # -O1: слияние пар команд в суперкоманды (uvm_asm.peephole)
+        self.optimize_var = tk.BooleanVar(value=False)
+        self.chk_optimize = ttk.Checkbutton(
+            self.toolbar,
+            text="Оптимизация -O1",
+            variable=self.optimize_var
+        )
 
         # Метки
         self.editor_label = ttk.Label(self, text="Исходный код (ASM):")
@@ -76,6 +88,8 @@ class UvmGuiApp(tk.Tk):
         # Toolbar
         self.toolbar.grid(row=0, column=0, columnspan=2, sticky="we")
         self.btn_run.pack(side="left", padx=5, pady=5)
+        self.btn_clear_cache.pack(side="left", padx=5, pady=5)
+        self.chk_optimize.pack(side="left", padx=5, pady=5)
 
         # Метки
         self.editor_label.grid(row=1, column=0, sticky="w", padx=5, pady=(5, 0))
@@ -95,7 +109,7 @@ class UvmGuiApp(tk.Tk):
         source = self.editor.get("1.0", "end")
 
         try:
-            result_text = run_uvm_source(source)
+            result_text = run_uvm_source(source, optimize=int(self.optimize_var.get()))
         except Exception as e:
             messagebox.showerror("Ошибка выполнения", f"{type(e).__name__}: {e}")
             return
@@ -106,6 +120,9 @@ class UvmGuiApp(tk.Tk):
         self.output.insert("1.0", result_text)
         self.output.configure(state="disabled")
 
+    def on_clear_cache_clicked(self):
+        clear_asm_cache()
+
 
 def main():
     app = UvmGuiApp()
@@ -1,25 +1,55 @@
 # uvm_memory.py
-import xml.etree.ElementTree as ET
+from array import array
+from xml.sax.saxutils import escape
 import io
 
+# Размер памяти данных УВМ по умолчанию (адреса 0..DATA_SIZE-1)
+DATA_SIZE = 2048
+
 # --- Opcode-to-Name Mapping (по полю A) ---
 OPCODE_NAMES = {
     14: "load_const",   # A=14
     11: "read_value",   # A=11
     94: "write_value",  # A=94
     69: "less",         # A=69
+    15: "store_imm",    # A=15, суперкоманда (uvm_asm.peephole)
+    70: "less_from",    # A=70, суперкоманда (uvm_asm.peephole)
 }
 
+# Та же таблица, индексируемая полем A (0..127); None — неизвестный opcode
+OPCODE_TABLE = tuple(OPCODE_NAMES.get(a) for a in range(128))
+
+
+# Нулевые образцы памяти данных по размеру: reset() копирует их на место
+_ZERO_DATA = {}
+
+
+def _zero_data(size: int) -> array:
+    """Возвращает (создавая один раз) заполненный нулями буфер int64 заданного размера."""
+    zeros = _ZERO_DATA.get(size)
+    if zeros is None:
+        zeros = _ZERO_DATA[size] = array("q", bytes(8 * size))
+    return zeros
+
 
 class UVMMemory:
     """Модель памяти, регистра-аккумулятора и IP для УВМ."""
 
-    def __init__(self, data_size=2048):
-        self.data = [0] * data_size
+    __slots__ = ("data", "stack", "ip", "acc")
+
+    def __init__(self, data_size=DATA_SIZE):
+        self.data = array("q", bytes(8 * data_size))  # int64, заполнено нулями
         self.stack = []       # оставляем на будущее
         self.ip = 0           # instruction pointer
         self.acc = 0          # регистр-аккумулятор
 
+    def reset(self):
+        """Возвращает память в начальное состояние на месте, без новой аллокации буфера данных."""
+        self.data[:] = _zero_data(len(self.data))
+        self.stack.clear()
+        self.ip = 0
+        self.acc = 0
+
     def push(self, value):
         self.stack.append(value)
 
@@ -28,6 +58,10 @@ class UVMMemory:
             raise IndexError("Стек пуст при выполнении POP.")
         return self.stack.pop()
 
+    def as_array(self) -> array:
+        """Память данных как типизированный буфер int64 (для ядра интерпретатора, без копирования)."""
+        return self.data
+
     def read_data(self, address: int) -> int:
         """Чтение из памяти данных."""
         if 0 <= address < len(self.data):
@@ -43,33 +77,37 @@ class UVMMemory:
 
 
 def dump_memory_to_xml_str(memory: UVMMemory, start_addr: int, end_addr: int) -> str:
-    """Генерирует дамп памяти в XML формате и возвращает его как строку (для GUI/CLI)."""
+    """
+    Генерирует дамп памяти в XML формате и возвращает его как строку (для GUI/CLI).
+    XML пишется напрямую в строковый буфер, без построения дерева элементов.
+    """
+
+    buf = io.StringIO()
+    w = buf.write
 
-    root = ET.Element("memory_dump")
+    w("<?xml version='1.0' encoding='utf-8'?>\n<memory_dump>")
 
     # 1. Стек
-    stack_elem = ET.SubElement(root, "stack")
-    stack_elem.text = ", ".join(map(str, memory.stack))
+    stack_text = escape(", ".join(map(str, memory.stack)))
+    w(f"<stack>{stack_text}</stack>" if stack_text else "<stack />")
 
     # 2. Регистры (IP, ACC)
-    regs_elem = ET.SubElement(root, "registers")
-    ET.SubElement(regs_elem, "ip").text = str(memory.ip)
-    ET.SubElement(regs_elem, "acc").text = str(memory.acc)
+    w(f"<registers><ip>{memory.ip}</ip><acc>{memory.acc}</acc></registers>")
 
-    # 3. Память данных
-    data_elem = ET.SubElement(root, "data_memory")
+    # 3. Память данных (значения — десятичные числа, экранирование не нужно)
     start = max(0, start_addr)
     end = min(end_addr + 1, len(memory.data))
 
-    for addr in range(start, end):
-        cell = ET.SubElement(data_elem, "cell", address=str(addr))
-        cell.text = str(memory.data[addr])
+    if start < end:
+        w("<data_memory>")
+        for addr in range(start, end):
+            w(f'<cell address="{addr}">{memory.data[addr]}</cell>')
+        w("</data_memory>")
+    else:
+        w("<data_memory />")
 
-    # Создание XML-строки
-    tree = ET.ElementTree(root)
-    xml_buffer = io.BytesIO()
-    tree.write(xml_buffer, encoding="utf-8", xml_declaration=True)
-    return xml_buffer.getvalue().decode("utf-8")
+    w("</memory_dump>")
+    return buf.getvalue()
 
 
 def dump_memory_to_xml(memory: UVMMemory, start_addr: int, end_addr: int, filename: str):